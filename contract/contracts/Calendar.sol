@@ -0,0 +1,30 @@
+pragma solidity ^0.8.0;
+
+import "kekeho/BokkyPooBahsDateTimeLibrary@1.02/contracts/BokkyPooBahsDateTimeLibrary.sol";
+
+
+// Months of an account are counted from its creation time `start`:
+// month `index` is [addMonths(start, index), addMonths(start, index + 1)).
+
+
+// Month of `timestamp` (>= start), and whether timestamp is just on the first second of the month
+function monthIndexOf(uint256 start, uint256 timestamp) pure returns (uint256 index, bool onBoundary) {
+    (uint256 startYear, uint256 startMonth, ) = BokkyPooBahsDateTimeLibrary.timestampToDate(start);
+    (uint256 year, uint256 month, ) = BokkyPooBahsDateTimeLibrary.timestampToDate(timestamp);
+
+    // difference of calendar months, at most 1 too many
+    // (the boundary in the month of timestamp can be later in the month than timestamp)
+    index = (year * 12 + month) - (startYear * 12 + startMonth);
+    uint256 boundary = monthBoundary(start, index);
+    if (boundary > timestamp) {
+        // the previous boundary is in the previous calendar month, so never equal to timestamp
+        return (index - 1, false);
+    }
+    return (index, boundary == timestamp);
+}
+
+
+// First second of month `index`, day of month is clamped like addMonths (e.g. Jan 31 => Feb 28)
+function monthBoundary(uint256 start, uint256 index) pure returns (uint256) {
+    return BokkyPooBahsDateTimeLibrary.addMonths(start, index);
+}
@@ -1,12 +1,15 @@
 pragma solidity ^0.8.0;
 
 import "OpenZeppelin/openzeppelin-contracts@4.4.1/contracts/utils/math/SafeMath.sol";
+import "OpenZeppelin/openzeppelin-contracts@4.4.1/contracts/utils/math/SafeCast.sol";
 import "OpenZeppelin/openzeppelin-contracts@4.4.1/contracts/token/ERC777/ERC777.sol";
 import "kekeho/BokkyPooBahsDateTimeLibrary@1.02/contracts/BokkyPooBahsDateTimeLibrary.sol";
 
 import "contracts/Utils.sol";
+import "contracts/Calendar.sol";
 
 
+// View of an account returned by getAccounts
 struct Config {
     uint256 id;
     address owner;  // creator of account
@@ -23,15 +26,71 @@ struct Config {
 }
 
 
+enum MonthStatus {
+    Pending,  // monthlyRemittrance is not reached yet in the current month
+    Achieved,  // monthlyRemittrance is reached in the current month
+    Exempted  // targetAmount is already reached, no penalty
+}
+
+
+// View of an account with its balance, returned by getAccountsWithBalances
+struct AccountBalance {
+    Config config;
+    uint256 balance;
+    uint256 monthTotal;  // total amount received in the current month
+    MonthStatus monthStatus;
+}
+
+
+// Storage layout of Config: fields used on every balance calculation are packed into 3 slots
+struct Account {
+    address owner;  // creator of account
+    uint64 created;
+    bool disabled;
+
+    address tokenContractAddress;  // token address
+    uint64 tokenAccountIndex;  // index in tokenAccountList
+
+    uint128 targetAmount;
+    uint128 monthlyRemittrance;
+}
+
+
+// Strings of Config, which are not needed to calculate balances
+struct Memo {
+    string subject;  // name of account
+    string description;  // memo
+}
+
+
 struct RecvTransaction {
     address from;
-    uint256 amount;
-    uint256 timestamp;
+    uint128 amount;
+    uint64 timestamp;
+    uint32 month;  // month index from created (see Calendar.sol)
+}
+
+
+// Recv-transactions of settled months which are deleted by compact
+struct RecvSummary {
+    uint128 balance;  // balance after the compacted months
+    uint128 received;  // total amount of compacted recv-transactions
+    uint32 count;  // number of compacted recv-transactions
+    uint32 months;  // number of compacted months, updated when every recv-transaction of them is compacted
+}
+
+
+struct Checkpoint {
+    uint128 balance;  // balance after settled months
+    uint128 pending;  // total amount received in the first unsettled month
+    uint128 received;  // total amount received
+    uint32 months;  // number of settled months
 }
 
 
 contract HardcoreBank is IERC777Recipient {
     using SafeMath for uint256;
+    using SafeCast for uint256;
     using BokkyPooBahsDateTimeLibrary for uint256;
 
     address private _owner;
@@ -39,10 +98,27 @@ contract HardcoreBank is IERC777Recipient {
     uint256 constant private _decimal = 18;
     IERC1820Registry private _erc1820Registry = IERC1820Registry(0x1820a4B7618BdE71Dce8cdc73aAB6C95905faD24);
 
-    Config[] private accountList;  // ID => account
+    Account[] private accountList;  // ID => account
+    mapping(uint256 => Memo) private memoList;  // ID => memo
     mapping(address => uint256[]) private userAccountList;  // user adderss => ID list
+    mapping(address => uint256) private activeAccountCount;  // user address => number of active accounts
 
     mapping(uint256 => RecvTransaction[]) private recvList;  // ID => RecvTransaction[]
+    mapping(uint256 => Checkpoint) private checkpoints;  // ID => Checkpoint
+    mapping(uint256 => uint256) private recvHead;  // ID => index of the first recv-transaction which is not compacted
+    mapping(uint256 => RecvSummary) private recvSummaries;  // ID => RecvSummary
+
+    mapping(address => uint256[]) private tokenAccountList;  // token address => active ID list
+    mapping(address => uint256) private disabledAmount;  // token address => forfeited amount of disabled accounts
+    mapping(address => uint256) private collectedTotal;  // token address => total amount sent by collect
+
+
+    event AccountCreated(uint256 indexed id, address indexed owner, address indexed token, string subject, string description, uint256 targetAmount, uint256 monthlyRemittrance, uint256 created);
+    event Deposited(uint256 indexed id, address indexed from, uint256 amount, uint256 timestamp);
+    event Disabled(uint256 indexed id);
+    event Withdrawn(uint256 indexed id, address indexed owner, uint256 amount);
+    event Collected(address indexed token, uint256 amount);
+    event Compacted(uint256 indexed id, uint256 months, uint256 count);
 
 
     constructor() {
@@ -57,34 +133,94 @@ contract HardcoreBank is IERC777Recipient {
     function createAccount(string calldata subject, string calldata description, address token, uint256 targetAmount, uint256 monthlyRemittrance) public {
         uint256 id = accountList.length;
         accountList.push(
-            Config(id, msg.sender, subject, description, token, targetAmount,
-                   monthlyRemittrance, block.timestamp, false)
+            Account(msg.sender, block.timestamp.toUint64(), false,
+                    token, tokenAccountList[token].length.toUint64(),
+                    targetAmount.toUint128(), monthlyRemittrance.toUint128())
         );
+        memoList[id] = Memo(subject, description);
         userAccountList[msg.sender].push(id);
+        activeAccountCount[msg.sender] = activeAccountCount[msg.sender].add(1);
+
+        tokenAccountList[token].push(id);
+
+        emit AccountCreated(id, msg.sender, token, subject, description, targetAmount, monthlyRemittrance, block.timestamp);
+    }
+
+
+    function _config(uint256 id) private view returns (Config memory) {
+        Account storage account = accountList[id];
+        Memo storage memo = memoList[id];
+        return Config(id, account.owner, memo.subject, memo.description,
+                      account.tokenContractAddress, account.targetAmount,
+                      account.monthlyRemittrance, account.created, account.disabled);
     }
 
 
     function getAccounts() public view returns (Config[] memory) {
-        // count length
-        uint256 active_length = 0;
-        for (uint256 i = 0; i < userAccountList[msg.sender].length; i=i.add(1)) {
-            uint256 id = userAccountList[msg.sender][i];
-            if (accountList[id].disabled == false) {
-                active_length = active_length.add(1);
-            }
+        (Config[] memory result, ) = getAccounts(0, activeAccountCount[msg.sender]);
+        return result;
+    }
+
+
+    // Returns active accounts from the cursor `offset`, and the next cursor (0 if no more accounts, or limit is 0)
+    function getAccounts(uint256 offset, uint256 limit) public view returns (Config[] memory, uint256) {
+        uint256[] storage ids = userAccountList[msg.sender];
+        uint256 active_length = activeAccountCount[msg.sender];
+        if (limit < active_length) {
+            active_length = limit;
         }
 
         Config[] memory result = new Config[](active_length);
         uint256 result_id = 0;
-        for (uint256 i = 0; i < userAccountList[msg.sender].length; i=i.add(1)) {
-            uint256 id = userAccountList[msg.sender][i];
+        uint256 i = offset;
+        for (; i < ids.length && result_id < active_length; i=i.add(1)) {
+            uint256 id = ids[i];
             // pass disabled
             if (accountList[id].disabled == false) {
-                result[result_id] = accountList[id];
+                result[result_id] = _config(id);
                 result_id = result_id.add(1);
             }
         }
 
+        // shrink to the number of found accounts
+        assembly {
+            mstore(result, result_id)
+        }
+
+        // no more accounts, or no progress (limit is 0)
+        if (i >= ids.length || i == offset) {
+            i = 0;
+        }
+        return (result, i);
+    }
+
+
+    // Active accounts with their balances, for the dashboard
+    function getAccountsWithBalances() public view returns (AccountBalance[] memory) {
+        (Config[] memory configs, ) = getAccounts(0, activeAccountCount[msg.sender]);
+
+        AccountBalance[] memory result = new AccountBalance[](configs.length);
+        for (uint256 i = 0; i < configs.length; i=i.add(1)) {
+            Config memory config = configs[i];
+            Account storage account = accountList[config.id];
+            Checkpoint memory checkpoint = checkpoints[config.id];
+            uint256 balance = _accountBalance(account, checkpoint);
+
+            // settled balance at the start of the current month, and the amount received since then
+            (uint256 month, ) = monthIndexOf(account.created, block.timestamp);
+            _settle(account, checkpoint, month);
+            uint256 monthTotal = checkpoint.pending;
+
+            MonthStatus status = MonthStatus.Pending;
+            if (monthTotal >= config.monthlyRemittrance) {
+                status = MonthStatus.Achieved;
+            } else if (checkpoint.balance >= config.targetAmount) {
+                status = MonthStatus.Exempted;
+            }
+
+            result[i] = AccountBalance(config, balance, monthTotal, status);
+        }
+
         return result;
     }
 
@@ -92,29 +228,158 @@ contract HardcoreBank is IERC777Recipient {
     // Logical Delete
     function disable(uint256 id) public {
         require(id < accountList.length);
-        require(accountList[id].disabled == false);
-        require(accountList[id].owner == msg.sender);
+        Account storage account = accountList[id];
+        require(account.disabled == false);
+        require(account.owner == msg.sender);
 
-        accountList[id].disabled = true;
+        _disable(id, account, checkpoints[id].received);
     }
 
 
+    // `forfeited`: amount of the account which is moved to the token total for collect
+    function _disable(uint256 id, Account storage account, uint256 forfeited) private {
+        account.disabled = true;
+        activeAccountCount[account.owner] = activeAccountCount[account.owner].sub(1);
+
+        // move deposits to the token total, and remove from active list
+        address token = account.tokenContractAddress;
+        disabledAmount[token] = disabledAmount[token].add(forfeited);
+
+        uint256[] storage tokenAccounts = tokenAccountList[token];
+        uint256 index = account.tokenAccountIndex;
+        uint256 lastId = tokenAccounts[tokenAccounts.length.sub(1)];
+        tokenAccounts[index] = lastId;
+        accountList[lastId].tokenAccountIndex = index.toUint64();
+        tokenAccounts.pop();
+
+        emit Disabled(id);
+    }
+
+
+    // data: account ID (32 bytes),
+    //       or abi.encode(uint256[] ids, uint256[] amounts) to deposit to many accounts at once
     function tokensReceived(address operator, address from, address to, uint256 amount, bytes calldata data, bytes calldata operatorData) external {
-        uint256 id = toUint256(data);
-        require(id < accountList.length);
-        require(accountList[id].disabled == false);
         require(to == address(this));
-        require(msg.sender == accountList[id].tokenContractAddress);
+
+        if (data.length <= 32) {
+            _deposit(toUint256(data), from, amount);
+            return;
+        }
+
+        (uint256[] memory ids, uint256[] memory amounts) = abi.decode(data, (uint256[], uint256[]));
+        require(ids.length == amounts.length);
+
+        uint256 total = 0;
+        for (uint256 i = 0; i < ids.length; i=i.add(1)) {
+            _deposit(ids[i], from, amounts[i]);
+            total = total.add(amounts[i]);
+        }
+        require(total == amount);
+    }
+
+
+    function _deposit(uint256 id, address from, uint256 amount) private {
+        require(id < accountList.length);
+        Account storage account = accountList[id];
+        require(account.disabled == false);
+        require(msg.sender == account.tokenContractAddress);
+
+        (uint256 month, ) = monthIndexOf(account.created, block.timestamp);
+        Checkpoint memory checkpoint = checkpoints[id];
+        _settle(account, checkpoint, month);
+        checkpoint.pending = uint256(checkpoint.pending).add(amount).toUint128();
+        checkpoint.received = uint256(checkpoint.received).add(amount).toUint128();
+        checkpoints[id] = checkpoint;
 
         recvList[id].push(
-            RecvTransaction(from, amount, block.timestamp)
+            RecvTransaction(from, amount.toUint128(), block.timestamp.toUint64(), month.toUint32())
         );
+
+        emit Deposited(id, from, amount, block.timestamp);
     }
 
 
     function tokensRecvList(uint256 id) public view returns (RecvTransaction[] memory) {
+        (RecvTransaction[] memory result, ) = tokensRecvList(id, 0, recvList[id].length);
+        return result;
+    }
+
+
+    // Returns recv-transactions from the cursor `offset`, and the next cursor (0 if no more transactions, or limit is 0)
+    // Compacted recv-transactions are skipped, see tokensRecvSummary
+    function tokensRecvList(uint256 id, uint256 offset, uint256 limit) public view returns (RecvTransaction[] memory, uint256) {
         require(isOwner(id));
-        return recvList[id];
+        RecvTransaction[] storage list = recvList[id];
+        if (offset < recvHead[id]) {
+            offset = recvHead[id];
+        }
+
+        uint256 end = offset.add(limit);
+        if (end > list.length) {
+            end = list.length;
+        }
+        uint256 length = 0;
+        if (offset < end) {
+            length = end.sub(offset);
+        }
+
+        RecvTransaction[] memory result = new RecvTransaction[](length);
+        for (uint256 i = 0; i < length; i=i.add(1)) {
+            result[i] = list[offset.add(i)];
+        }
+
+        // no more transactions, or no progress (limit is 0)
+        if (end >= list.length || end == offset) {
+            end = 0;
+        }
+        return (result, end);
+    }
+
+
+    function tokensRecvSummary(uint256 id) public view returns (RecvSummary memory) {
+        require(isOwner(id));
+        return recvSummaries[id];
+    }
+
+
+    // Fold up to `maxCount` recv-transactions of settled months into the summary and delete them
+    // (each of them remains in the Deposited event), call again to continue from where it stopped
+    function compact(uint256 id, uint256 maxCount) public {
+        require(isOwner(id) || isGrandOwner());
+        Account storage account = accountList[id];
+        require(account.disabled == false);
+
+        (uint256 month, ) = monthIndexOf(account.created, block.timestamp);
+        Checkpoint memory checkpoint = checkpoints[id];
+        _settle(account, checkpoint, month);
+        checkpoints[id] = checkpoint;
+
+        RecvTransaction[] storage list = recvList[id];
+        uint256 head = recvHead[id];
+        uint256 received = 0;
+        uint256 end = head.add(maxCount);
+        if (end > list.length) {
+            end = list.length;
+        }
+        uint256 i = head;
+        for (; i < end; i=i.add(1)) {
+            RecvTransaction storage recv = list[i];
+            if (recv.month >= checkpoint.months) { break; }
+            received = received.add(recv.amount);
+            delete list[i];
+        }
+        recvHead[id] = i;
+
+        RecvSummary storage summary = recvSummaries[id];
+        summary.received = uint256(summary.received).add(received).toUint128();
+        summary.count = uint256(summary.count).add(i.sub(head)).toUint32();
+        if (i == list.length || list[i].month >= checkpoint.months) {
+            // every settled month is compacted
+            summary.balance = checkpoint.balance;
+            summary.months = checkpoint.months;
+        }
+
+        emit Compacted(id, summary.months, i.sub(head));
     }
 
 
@@ -126,103 +391,173 @@ contract HardcoreBank is IERC777Recipient {
 
     function _balanceOf(uint256 id) private view returns (uint256) {
         require(id < accountList.length);
-        Config memory accountConfig = accountList[id];
-        require(accountConfig.disabled == false);
-
-        // calc total amount
-        uint256 start = accountConfig.created;
-        uint256 totalAmount = 0;  // result
-        uint256 ri = 0;  // recvList index
-        uint256 addMonth = 1;
-        // calc par month
-        while (true) {
-            // next year/month
-            uint256 nextMonth = BokkyPooBahsDateTimeLibrary.addMonths(start, addMonth);
-            uint256 currentMonth = BokkyPooBahsDateTimeLibrary.addMonths(start, addMonth.sub(1));
-
-            uint256 monthTotal = 0;
-            // look each recv-transaction
-            while (ri < recvList[id].length) {
-                RecvTransaction memory recv = recvList[id][ri];
-                if (recv.timestamp >= nextMonth) {
-                    break;
-                }
-                monthTotal = monthTotal.add(recv.amount);
-                ri = ri.add(1);
-            }
+        Account storage account = accountList[id];
+        require(account.disabled == false);
+        return _accountBalance(account, checkpoints[id]);
+    }
 
 
-            if (currentMonth < block.timestamp && block.timestamp < nextMonth) {
-                // current month
-                totalAmount = totalAmount.add(monthTotal);
-            } else if (monthTotal >= accountConfig.monthlyRemittrance) {
-                // old great month
-                totalAmount = totalAmount.add(monthTotal);
-            } else {
-                // old failed month
-                if ( totalAmount >= accountConfig.targetAmount ) {
-                    totalAmount = totalAmount.add(monthTotal);
-                } else {
-                    totalAmount = totalAmount.add(monthTotal);  // totalAmount += monthTotal
-                    totalAmount = totalAmount.sub(totalAmount.div(5));  // totalAmount -= totalAmount/5
-                }
-            }
+    function _accountBalance(Account storage account, Checkpoint memory checkpoint) private view returns (uint256) {
+        uint256 targetAmount = account.targetAmount;
+        uint256 monthlyRemittrance = account.monthlyRemittrance;
 
-            addMonth = addMonth.add(1);
-            if (nextMonth > block.timestamp) { break; }
+        // continue from the last checkpoint
+        (uint256 month, bool onBoundary) = monthIndexOf(account.created, block.timestamp);
+        uint256 months = checkpoint.months;
+        uint256 totalAmount = checkpoint.balance;  // result
+        uint256 monthTotal = checkpoint.pending;
+
+        // months which are already over
+        if (month > months) {
+            totalAmount = _closeMonths(totalAmount, monthTotal, month.sub(months), targetAmount, monthlyRemittrance);
+            monthTotal = 0;  // no recv-transaction after the checkpoint month
+        }
+
+        if (onBoundary) {
+            // the current month has just begun, so the previous one is closed
+            totalAmount = _closeMonth(totalAmount, monthTotal, targetAmount, monthlyRemittrance);
+        } else {
+            // current month
+            totalAmount = totalAmount.add(monthTotal);
         }
 
         return totalAmount;
     }
 
 
-    function collectedAmount(address tokenContractAddress) public view returns (uint256) {
-        require(isGrandOwner());
+    // Apply the monthly rule to a month which is already over
+    function _closeMonth(uint256 totalAmount, uint256 monthTotal, uint256 targetAmount, uint256 monthlyRemittrance) private pure returns (uint256) {
+        if (monthTotal >= monthlyRemittrance) {
+            // old great month
+            return totalAmount.add(monthTotal);
+        }
 
-        uint256 result = 0;
+        // old failed month
+        if ( totalAmount >= targetAmount ) {
+            return totalAmount.add(monthTotal);
+        }
+        totalAmount = totalAmount.add(monthTotal);  // totalAmount += monthTotal
+        return totalAmount.sub(totalAmount.div(5));  // totalAmount -= totalAmount/5
+    }
 
-        for (uint256 id = 0; id < accountList.length; id=id.add(1)) {
-            Config memory account = accountList[id];
-            if (account.tokenContractAddress != tokenContractAddress) { continue; }
 
-            uint256 sum = 0;
-            for (uint256 j = 0; j < recvList[id].length; j=j.add(1)) {
-                sum = sum.add(recvList[id][j].amount);
-            }
+    // Close `count` months which are already over, the first one with `monthTotal` and the rest without recv-transactions
+    function _closeMonths(uint256 totalAmount, uint256 monthTotal, uint256 count, uint256 targetAmount, uint256 monthlyRemittrance) private pure returns (uint256) {
+        if (count == 0) { return totalAmount; }
+        totalAmount = _closeMonth(totalAmount, monthTotal, targetAmount, monthlyRemittrance);
 
-            if (account.disabled) {
-                result = result.add(sum);
-            } else {
-                result = result.add(sum.sub(_balanceOf(id)));
-            }
+        // empty months change nothing once the target is reached, without monthlyRemittrance, or when 20% rounds to 0
+        for (uint256 i = 1; i < count && totalAmount >= 5 && totalAmount < targetAmount && monthlyRemittrance > 0; i=i.add(1)) {
+            totalAmount = totalAmount.sub(totalAmount.div(5));
         }
+        return totalAmount;
+    }
 
-        return result;
+
+    // Fold every month before `month` (the current month index) into the checkpoint (in memory)
+    function _settle(Account storage account, Checkpoint memory checkpoint, uint256 month) private view {
+        uint256 months = checkpoint.months;
+        if (month <= months) { return; }
+
+        checkpoint.balance = _closeMonths(checkpoint.balance, checkpoint.pending, month.sub(months),
+                                          account.targetAmount, account.monthlyRemittrance).toUint128();
+        checkpoint.pending = 0;
+        checkpoint.months = month.toUint32();
+    }
+
+
+    function collectedAmount(address tokenContractAddress) public view returns (uint256) {
+        require(isGrandOwner());
+
+        // disabled accounts
+        uint256 result = disabledAmount[tokenContractAddress];
+
+        // active accounts
+        uint256[] storage ids = tokenAccountList[tokenContractAddress];
+        for (uint256 i = 0; i < ids.length; i=i.add(1)) {
+            uint256 id = ids[i];
+            result = result.add(uint256(checkpoints[id].received).sub(_balanceOf(id)));
+        }
+
+        // already collected
+        return result.sub(collectedTotal[tokenContractAddress]);
     }
 
 
     function collect(address tokenContractAddress) public {
         require(isGrandOwner());
+        require(_collect(tokenContractAddress) > 0);
+    }
+
+
+    // Tokens with nothing to collect are skipped
+    function collectMany(address[] calldata tokenContractAddresses) public {
+        require(isGrandOwner());
+        for (uint256 i = 0; i < tokenContractAddresses.length; i=i.add(1)) {
+            _collect(tokenContractAddresses[i]);
+        }
+    }
+
 
+    // Returns the collected amount
+    function _collect(address tokenContractAddress) private returns (uint256) {
         uint256 amount = collectedAmount(tokenContractAddress);
-        require(amount > 0);
-        
+        if (amount == 0) { return 0; }
+        collectedTotal[tokenContractAddress] = collectedTotal[tokenContractAddress].add(amount);
+
         IERC777 tokenContract = IERC777(tokenContractAddress);
         tokenContract.send(_owner, amount, bytes(""));
+
+        emit Collected(tokenContractAddress, amount);
+        return amount;
     }
 
 
     function withdraw(uint256 id) public {
-        require(isOwner(id));
-        Config memory account = accountList[id];
-        uint256 balance = balanceOf(id);
+        (address token, uint256 balance) = _withdraw(id);
+        IERC777(token).send(msg.sender, balance, bytes(""));
+    }
+
+
+    // Withdraw many accounts, sending once per run of accounts with the same token
+    function withdrawMany(uint256[] calldata ids) public {
+        address token = address(0);
+        uint256 amount = 0;
+        for (uint256 i = 0; i < ids.length; i=i.add(1)) {
+            (address accountToken, uint256 balance) = _withdraw(ids[i]);
+            if (accountToken != token) {
+                if (amount > 0) {
+                    IERC777(token).send(msg.sender, amount, bytes(""));
+                }
+                token = accountToken;
+                amount = 0;
+            }
+            amount = amount.add(balance);
+        }
+        if (amount > 0) {
+            IERC777(token).send(msg.sender, amount, bytes(""));
+        }
+    }
+
+
+    // Disable the account and returns the token and the amount to send to its owner (msg.sender)
+    function _withdraw(uint256 id) private returns (address, uint256) {
+        require(id < accountList.length);
+        Account storage account = accountList[id];
+        require(account.owner == msg.sender);
+        require(account.disabled == false);
+
+        Checkpoint memory checkpoint = checkpoints[id];
+        uint256 balance = _accountBalance(account, checkpoint);
         require(balance >= account.targetAmount);
 
-        // send
-        IERC777 tokenContract = IERC777(account.tokenContractAddress);
-        tokenContract.send(account.owner, balance, bytes(""));
-        
-        disable(id);
+        // disable before sending, so the recipient hook can't withdraw again
+        // only the forfeited part remains in the contract for collect
+        _disable(id, account, uint256(checkpoint.received).sub(balance));
+        delete checkpoints[id];
+
+        emit Withdrawn(id, msg.sender, balance);
+        return (account.tokenContractAddress, balance);
     }
 
 
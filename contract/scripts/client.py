@@ -0,0 +1,184 @@
+"""Asynchronous read-only client of HardcoreBank, for reading many accounts at once.
+
+Calls are sent concurrently over a bounded connection pool, pinned to a
+block number, and cached per block: repeated reads in the same block never
+hit the node.
+
+    python scripts/client.py <endpoint> <HardcoreBank address> <owner> [id ...]
+
+    async with Client(endpoint, address) as client:
+        async for id, balance in client.balances(ids, owner):
+            ...
+"""
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+import aiohttp
+from eth_abi import decode_abi, encode_abi
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+
+
+ABI_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'front', 'dist', 'abi', 'HardcoreBank.json')
+
+
+class RPCError(Exception):
+    pass
+
+
+def load_abi(path=ABI_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def abi_type(param):
+    # 'tuple[]' with components => '(uint256,address,...)[]'
+    if not param['type'].startswith('tuple'):
+        return param['type']
+    components = ','.join(abi_type(c) for c in param['components'])
+    return f'({components}){param["type"][len("tuple"):]}'
+
+
+class Function:
+
+    def __init__(self, abi):
+        self.abi = abi
+        self.selector = function_abi_to_4byte_selector(abi)
+        self.input_types = [abi_type(p) for p in abi['inputs']]
+        self.output_types = [abi_type(p) for p in abi['outputs']]
+
+    def encode(self, args):
+        return '0x' + (self.selector + encode_abi(self.input_types, args)).hex()
+
+    def decode(self, data):
+        result = decode_abi(self.output_types, bytes.fromhex(data[2:]))
+        return result[0] if len(result) == 1 else result
+
+
+class Client:
+
+    def __init__(self, endpoint, address, abi=None, connections=16, ttl=1.0):
+        """
+        connections: maximum number of concurrent connections to the node
+        ttl: seconds to reuse the latest block number (and results of older blocks)
+        """
+        self.endpoint = endpoint
+        self.address = to_checksum_address(str(address))
+        self.connections = connections
+        self.ttl = ttl
+        self.requests = 0  # number of requests sent to the node
+
+        # functions by (name, number of inputs), for overloads like getAccounts
+        self._functions = {}
+        for item in load_abi() if abi is None else abi:
+            if item['type'] == 'function':
+                self._functions[(item['name'], len(item['inputs']))] = Function(item)
+
+        self._session = None
+        self._ids = itertools.count(1)
+        self._block = None  # (expires, task)
+        self._cache = {}  # (block, name, args, sender) => (expires, task)
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.connections)
+        self._session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def _request(self, method, params):
+        self.requests += 1
+        payload = {'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': params}
+        async with self._session.post(self.endpoint, json=payload) as resp:
+            resp.raise_for_status()
+            result = await resp.json()
+        if 'error' in result:
+            raise RPCError(f'{method}: {result["error"]}')
+        return result['result']
+
+    def _cached(self, key, factory, now):
+        # share one task between concurrent callers, and drop it on error
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        task = asyncio.ensure_future(factory())
+        task.add_done_callback(lambda task: self._drop_failed(key, task))
+        self._cache[key] = (now + self.ttl, task)
+        return task
+
+    def _drop_failed(self, key, task):
+        if task.cancelled() or task.exception() is not None:
+            if self._cache.get(key, (None, None))[1] is task:
+                del self._cache[key]
+
+    async def block_number(self):
+        now = time.monotonic()
+        if self._block is None or self._block[0] <= now:
+            self._block = (now + self.ttl, asyncio.ensure_future(self._request('eth_blockNumber', [])))
+            # expired results of old blocks
+            self._cache = {key: entry for key, entry in self._cache.items() if entry[0] > now}
+        try:
+            return int(await self._block[1], 16)
+        except Exception:
+            self._block = None
+            raise
+
+    async def call(self, name, *args, sender=None, block=None):
+        """eth_call of a view function at `block` (default: latest block number)"""
+        function = self._functions[(name, len(args))]
+        if block is None:
+            block = await self.block_number()
+
+        async def request():
+            tx = {'to': self.address, 'data': function.encode(args)}
+            if sender is not None:
+                tx['from'] = str(sender)
+            return function.decode(await self._request('eth_call', [tx, hex(block)]))
+
+        key = (block, name, args, None if sender is None else str(sender).lower())
+        return await self._cached(key, request, time.monotonic())
+
+    async def balance_of(self, id, sender, block=None):
+        return await self.call('balanceOf', id, sender=sender, block=block)
+
+    async def is_owner(self, id, sender, block=None):
+        return await self.call('isOwner', id, sender=sender, block=block)
+
+    async def get_accounts(self, sender, offset=None, limit=None, block=None):
+        """Active accounts of `sender`, or a page of them and the next cursor with limit"""
+        if limit is None:
+            return await self.call('getAccounts', sender=sender, block=block)
+        return await self.call('getAccounts', offset or 0, limit, sender=sender, block=block)
+
+    async def balances(self, ids, sender, block=None):
+        """Yields (id, balance) as soon as each of them arrives, all at the same block"""
+        if block is None:
+            block = await self.block_number()
+
+        async def balance(id):
+            return id, await self.balance_of(id, sender, block)
+
+        for future in asyncio.as_completed([balance(id) for id in ids]):
+            yield await future
+
+
+async def _main(endpoint, address, owner, *ids):
+    async with Client(endpoint, address) as client:
+        if not ids:
+            ids = [account[0] for account in await client.get_accounts(owner)]
+        async for id, balance in client.balances([int(id) for id in ids], owner):
+            print(id, balance)
+
+
+def main(endpoint, address, owner, *ids):
+    asyncio.run(_main(endpoint, address, owner, *ids))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,223 @@
+"""Index HardcoreBank events into a local SQLite database.
+
+    brownie run indexer main <HardcoreBank address> [database] --network ropsten
+
+Balances are calculated from the indexed deposits with scripts/rules.py,
+so dashboards can read the database instead of calling the contract.
+"""
+import os
+import sqlite3
+import time
+
+from brownie import HardcoreBank, web3
+from eth_utils import event_abi_to_log_topic
+
+from scripts import rules
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS accounts (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    token TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    description TEXT NOT NULL,
+    target_amount TEXT NOT NULL,
+    monthly_remittrance TEXT NOT NULL,
+    created INTEGER NOT NULL,
+    disabled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS deposits (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS deposits_id ON deposits (id, timestamp);
+CREATE TABLE IF NOT EXISTS withdrawals (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE TABLE IF NOT EXISTS collections (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE TABLE IF NOT EXISTS cursor (
+    address TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+'''
+
+
+class Indexer:
+    # amounts are uint256, so they are stored as decimal TEXT
+
+    def __init__(self, address, database=':memory:', w3=web3, block_range=1000, start_block=0):
+        self.w3 = w3
+        self.address = w3.toChecksumAddress(str(address))
+        self.contract = w3.eth.contract(address=self.address, abi=HardcoreBank.abi)
+        self.block_range = block_range
+        self.start_block = start_block
+
+        self.db = sqlite3.connect(database)
+        self.db.executescript(SCHEMA)
+
+        self._events = {}  # topic => event
+        for abi in self.contract.abi:
+            if abi['type'] == 'event':
+                self._events[event_abi_to_log_topic(abi)] = self.contract.events[abi['name']]()
+
+    @property
+    def last_block(self):
+        row = self.db.execute('SELECT block FROM cursor WHERE address = ?', (self.address,)).fetchone()
+        return self.start_block - 1 if row is None else row[0]
+
+    def sync(self, to_block=None):
+        """Index logs up to `to_block` (default: latest), returns the number of stored logs"""
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+
+        count = 0
+        from_block = self.last_block + 1
+        while from_block <= to_block:
+            end = min(from_block + self.block_range - 1, to_block)
+            logs = self.w3.eth.get_logs({'address': self.address, 'fromBlock': from_block, 'toBlock': end})
+
+            # one transaction per block range, with the cursor
+            with self.db:
+                for log in logs:
+                    count += self._store(log)
+                self.db.execute(
+                    'INSERT OR REPLACE INTO cursor (address, block) VALUES (?, ?)',
+                    (self.address, end),
+                )
+            from_block = end + 1
+
+        return count
+
+    def follow(self, poll_interval=5, confirmations=0):
+        while True:
+            latest = self.w3.eth.block_number - confirmations
+            if latest > self.last_block:
+                self.sync(latest)
+            time.sleep(poll_interval)
+
+    def _store(self, log):
+        event = self._events.get(bytes(log['topics'][0]))
+        if event is None:
+            return 0
+
+        data = event.processLog(log)
+        args = data['args']
+        key = (data['blockNumber'], data['logIndex'])
+        name = data['event']
+
+        if name == 'AccountCreated':
+            self.db.execute(
+                'INSERT OR IGNORE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                (args['id'], args['owner'], args['token'], args['subject'], args['description'],
+                 str(args['targetAmount']), str(args['monthlyRemittrance']), args['created']),
+            )
+        elif name == 'Deposited':
+            self.db.execute(
+                'INSERT OR IGNORE INTO deposits VALUES (?, ?, ?, ?, ?, ?)',
+                key + (args['id'], args['from'], str(args['amount']), args['timestamp']),
+            )
+        elif name == 'Disabled':
+            self.db.execute('UPDATE accounts SET disabled = 1 WHERE id = ?', (args['id'],))
+        elif name == 'Withdrawn':
+            self.db.execute(
+                'INSERT OR IGNORE INTO withdrawals VALUES (?, ?, ?, ?, ?)',
+                key + (args['id'], args['owner'], str(args['amount'])),
+            )
+        elif name == 'Collected':
+            self.db.execute(
+                'INSERT OR IGNORE INTO collections VALUES (?, ?, ?, ?)',
+                key + (args['token'], str(args['amount'])),
+            )
+        return 1
+
+    def accounts(self, owner=None, token=None, include_disabled=False):
+        query = 'SELECT * FROM accounts WHERE 1 = 1'
+        params = []
+        if owner is not None:
+            query += ' AND owner = ?'
+            params.append(str(owner))
+        if token is not None:
+            query += ' AND token = ?'
+            params.append(str(token))
+        if not include_disabled:
+            query += ' AND disabled = 0'
+        query += ' ORDER BY id'
+        return [self._account_row(row) for row in self.db.execute(query, params)]
+
+    def account(self, id):
+        row = self.db.execute('SELECT * FROM accounts WHERE id = ?', (id,)).fetchone()
+        if row is None:
+            raise KeyError(id)
+        return self._account_row(row)
+
+    @staticmethod
+    def _account_row(row):
+        columns = ['id', 'owner', 'token', 'subject', 'description',
+                   'targetAmount', 'monthlyRemittrance', 'created', 'disabled']
+        account = dict(zip(columns, row))
+        account['targetAmount'] = int(account['targetAmount'])
+        account['monthlyRemittrance'] = int(account['monthlyRemittrance'])
+        account['disabled'] = bool(account['disabled'])
+        return account
+
+    def deposits(self, id):
+        rows = self.db.execute(
+            'SELECT timestamp, amount FROM deposits WHERE id = ? ORDER BY block, log_index', (id,)
+        )
+        return [(timestamp, int(amount)) for timestamp, amount in rows]
+
+    def _now(self, now):
+        if now is None:
+            return self.w3.eth.get_block('latest')['timestamp']
+        return now
+
+    def balance_of(self, id, now=None):
+        account = self.account(id)
+        if account['disabled']:
+            raise ValueError(f'account {id} is disabled')
+        return rules.balance_of(account['created'], account['targetAmount'],
+                                account['monthlyRemittrance'], self.deposits(id), self._now(now))
+
+    def collected_amount(self, token, now=None):
+        now = self._now(now)
+        result = 0
+        for account in self.accounts(token=token, include_disabled=True):
+            deposits = self.deposits(account['id'])
+            received = sum(amount for _, amount in deposits)
+            if account['disabled']:
+                # forfeited, except the amount sent back by withdraw
+                rows = self.db.execute('SELECT amount FROM withdrawals WHERE id = ?', (account['id'],))
+                result += received - sum(int(amount) for amount, in rows)
+            else:
+                result += received - rules.balance_of(account['created'], account['targetAmount'],
+                                                      account['monthlyRemittrance'], deposits, now)
+
+        # already collected
+        rows = self.db.execute('SELECT amount FROM collections WHERE token = ?', (str(token),))
+        return result - sum(int(amount) for amount, in rows)
+
+
+def main(address, database='reports/indexer.sqlite3', poll_interval=5):
+    if os.path.dirname(database):
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+
+    indexer = Indexer(address, database)
+    print(f'Indexing {indexer.address} from block {indexer.last_block + 1}')
+    indexer.follow(int(poll_interval))
@@ -0,0 +1,188 @@
+"""Simulate many savers over many months on a local chain.
+
+    brownie run loadgen main [accounts] [senders] [tokens] [months] [workers]
+
+Reports transactions per second, gas percentiles of each function and how
+balanceOf / collectedAmount latency grows month by month, and writes them
+to reports/loadgen.json.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+from brownie import HardcoreBank, SampleToken, accounts, chain, convert
+
+from scripts.erc1820 import deploy_registry
+
+
+MONTH = 2629746  # average month [s]
+MONTHLY = 10**15
+SAMPLE = 20  # accounts to measure latency
+
+
+class LoadGenerator:
+
+    def __init__(self, n_senders, n_tokens, workers, seed=0):
+        self.random = random.Random(seed)
+        self.workers = workers
+        self.deployer = accounts[0]
+        deploy_registry(self.deployer)
+
+        self.bank = HardcoreBank.deploy({'from': self.deployer})
+        self.tokens = [SampleToken.deploy({'from': self.deployer}) for _ in range(n_tokens)]
+
+        # senders: local accounts, funded with ether and every token
+        self.senders = list(accounts[1:n_senders + 1])
+        while len(self.senders) < n_senders:
+            self.senders.append(accounts.add())
+        for sender in self.senders:
+            if sender.balance() < 10**18:
+                self.deployer.transfer(sender, 10**19)
+            for token in self.tokens:
+                share = token.balanceOf(self.deployer) // (n_senders + 1)
+                token.send(sender, share, b'', {'from': self.deployer})
+
+        self.nonces = {sender.address: sender.nonce for sender in self.senders}
+        self.ids = []  # [(id, owner, token, targetAmount)]
+        self.gas = defaultdict(list)  # function => gas used
+        self.throughput = []  # per phase
+        self.latency = []  # per month
+
+    def _send_all(self, sender, jobs):
+        # one sender's transactions in nonce order, without waiting for confirmation
+        txs = []
+        for index, fn, args in jobs:
+            nonce = self.nonces[sender.address]
+            self.nonces[sender.address] += 1
+            txs.append((index, fn(*args, {'from': sender, 'nonce': nonce, 'required_confs': 0})))
+        return txs
+
+    def run(self, name, jobs):
+        """jobs: [(sender, fn, args)], senders run in parallel, returns transactions in the order of jobs"""
+        by_sender = defaultdict(list)
+        for index, (sender, fn, args) in enumerate(jobs):
+            by_sender[sender].append((index, fn, args))
+
+        start = time.perf_counter()
+        txs = [None] * len(jobs)
+        with ThreadPoolExecutor(self.workers) as pool:
+            for sender_txs in pool.map(lambda item: self._send_all(*item), by_sender.items()):
+                for index, tx in sender_txs:
+                    txs[index] = tx
+        for tx in txs:
+            tx.wait(1)
+        elapsed = time.perf_counter() - start
+
+        failed = 0
+        for tx in txs:
+            if tx.status == 1:
+                self.gas[name].append(tx.gas_used)
+            else:
+                failed += 1
+
+        tps = len(txs) / elapsed if elapsed > 0 else 0
+        self.throughput.append({'phase': name, 'transactions': len(txs), 'failed': failed,
+                                'seconds': elapsed, 'tps': tps})
+        print(f'{name}: {len(txs)} txs ({failed} failed) in {elapsed:.1f}s, {tps:.1f} tx/s')
+        return txs
+
+    def create_accounts(self, n_accounts):
+        jobs = []
+        plan = []
+        for i in range(n_accounts):
+            owner = self.senders[i % len(self.senders)]
+            token = self.tokens[i % len(self.tokens)]
+            target = MONTHLY * self.random.randint(6, 36)
+            jobs.append((owner, self.bank.createAccount,
+                         (f'saving {i}', 'load test', token.address, target, MONTHLY)))
+            plan.append((owner, token, target))
+
+        txs = self.run('createAccount', jobs)
+        for tx, (owner, token, target) in zip(txs, plan):
+            if tx.status == 1:
+                self.ids.append((tx.events['AccountCreated']['id'], owner, token, target))
+
+    def deposit_month(self, skip_rate=0.15):
+        jobs = []
+        for id, owner, token, _ in self.ids:
+            if self.random.random() < skip_rate:
+                continue  # failed month
+            amount = int(MONTHLY * self.random.uniform(0.5, 1.5))
+            jobs.append((owner, token.send, (self.bank.address, amount, convert.to_bytes(id))))
+        self.run('tokensReceived', jobs)
+
+    def measure(self, month):
+        sample = self.random.sample(self.ids, min(SAMPLE, len(self.ids)))
+
+        balance_latency = []
+        balance_gas = []
+        for id, owner, _, _ in sample:
+            start = time.perf_counter()
+            self.bank.balanceOf.call(id, {'from': owner})
+            balance_latency.append(time.perf_counter() - start)
+            balance_gas.append(self.bank.balanceOf.estimate_gas(id, {'from': owner}))
+
+        collected_latency = []
+        for token in self.tokens:
+            start = time.perf_counter()
+            self.bank.collectedAmount.call(token.address, {'from': self.deployer})
+            collected_latency.append(time.perf_counter() - start)
+
+        row = {
+            'month': month,
+            'balanceOf_latency': statistics.median(balance_latency),
+            'balanceOf_gas': statistics.median(balance_gas),
+            'collectedAmount_latency': statistics.median(collected_latency),
+        }
+        self.latency.append(row)
+        print(f'month {month}: balanceOf {row["balanceOf_latency"]*1000:.1f}ms ({row["balanceOf_gas"]} gas), '
+              f'collectedAmount {row["collectedAmount_latency"]*1000:.1f}ms')
+
+    def finish(self):
+        jobs = []
+        for id, owner, _, target in self.ids:
+            if self.bank.balanceOf.call(id, {'from': owner}) >= target:
+                jobs.append((owner, self.bank.withdraw, (id,)))
+        self.run('withdraw', jobs)
+
+        for token in self.tokens:
+            if self.bank.collectedAmount.call(token.address, {'from': self.deployer}) > 0:
+                tx = self.bank.collect(token.address, {'from': self.deployer})
+                self.gas['collect'].append(tx.gas_used)
+
+    def report(self):
+        gas = {}
+        for name, values in self.gas.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            gas[name] = {'count': len(values), 'p50': p50, 'p90': p90, 'p99': p99, 'max': max(values)}
+
+        print('gas used:')
+        for name, g in sorted(gas.items()):
+            print(f'  {name}: p50 {g["p50"]:.0f}, p90 {g["p90"]:.0f}, p99 {g["p99"]:.0f}, max {g["max"]}')
+
+        return {'throughput': self.throughput, 'gas': gas, 'latency': self.latency}
+
+
+def main(n_accounts=1000, n_senders=10, n_tokens=3, months=24, workers=8):
+    n_accounts, n_senders, n_tokens, months, workers = map(int, (n_accounts, n_senders, n_tokens, months, workers))
+
+    generator = LoadGenerator(n_senders, n_tokens, workers)
+    generator.create_accounts(n_accounts)
+
+    for month in range(1, months + 1):
+        generator.deposit_month()
+        chain.sleep(MONTH)
+        chain.mine()
+        generator.measure(month)
+
+    generator.finish()
+    result = generator.report()
+
+    os.makedirs('reports', exist_ok=True)
+    with open('reports/loadgen.json', 'w') as f:
+        json.dump(result, f, indent=2, default=float)
@@ -0,0 +1,173 @@
+"""Vectorized reference engine of the HardcoreBank monthly rules.
+
+Calculates balances of many accounts at once with NumPy. Month boundaries
+are the same as BokkyPooBahsDateTimeLibrary.addMonths (see scripts/rules.py).
+
+What-if against the indexer database (see scripts/indexer.py):
+
+    python scripts/reference.py reports/indexer.sqlite3 [timestamp]
+"""
+from collections import namedtuple
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+OFFSET19700101 = 2440588
+INT64_MAX = np.iinfo(np.int64).max
+
+Result = namedtuple('Result', ['balance', 'received', 'forfeited'])
+
+
+def amount_array(values, int64=True):
+    # exact python integers, or int64 if requested and possible
+    values = [int(v) for v in values]
+    if int64 and all(0 <= v <= INT64_MAX for v in values):
+        return np.array(values, dtype=np.int64)
+    return np.array(values, dtype=object)
+
+
+def days_to_date(days):
+    L = np.asarray(days, dtype=np.int64) + 68569 + OFFSET19700101
+    N = 4 * L // 146097
+    L = L - (146097 * N + 3) // 4
+    year = 4000 * (L + 1) // 1461001
+    L = L - 1461 * year // 4 + 31
+    month = 80 * L // 2447
+    day = L - 2447 * month // 80
+    L = month // 11
+    month = month + 2 - 12 * L
+    year = 100 * (N - 49) + year + L
+    return year, month, day
+
+
+def days_from_date(year, month, day):
+    _month = np.where(month <= 2, -1, 0)  # (month - 14) / 12, truncated like solidity
+    return (day - 32075 + 1461 * (year + 4800 + _month) // 4
+            + 367 * (month - 2 - _month * 12) // 12
+            - 3 * ((year + 4900 + _month) // 100) // 4
+            - OFFSET19700101)
+
+
+def days_in_month(year, month):
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    days = np.where(np.isin(month, [4, 6, 9, 11]), 30, 31)
+    return np.where(month == 2, np.where(leap, 29, 28), days)
+
+
+def add_months(timestamps, months):
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    year, month, day = days_to_date(timestamps // SECONDS_PER_DAY)
+    month = month + np.asarray(months, dtype=np.int64)
+    year = year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    day = np.minimum(day, days_in_month(year, month))
+    return days_from_date(year, month, day) * SECONDS_PER_DAY + timestamps % SECONDS_PER_DAY
+
+
+def month_index(created, timestamps):
+    """1-based month of each timestamp, counted from `created` (addMonths(created, k-1) <= t < addMonths(created, k))"""
+    created = np.asarray(created, dtype=np.int64)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+
+    cy, cm, _ = days_to_date(created // SECONDS_PER_DAY)
+    ty, tm, _ = days_to_date(timestamps // SECONDS_PER_DAY)
+    months = (ty - cy) * 12 + (tm - cm)  # calendar months, at most 1 too many
+    months = np.where(add_months(created, months) > timestamps, months - 1, months)
+    return months + 1
+
+
+def evaluate(created, target_amount, monthly_remittrance, deposit_account, deposit_timestamp, deposit_amount, now):
+    """Balances of accounts at `now`
+
+    created, target_amount, monthly_remittrance: one element per account
+    deposit_account, deposit_timestamp, deposit_amount: one element per deposit,
+        deposit_account is the index of the account
+    now: timestamp, or one timestamp per account
+    """
+    created = np.asarray(created, dtype=np.int64)
+    deposit_account = np.asarray(deposit_account, dtype=np.int64)
+    deposit_timestamp = np.asarray(deposit_timestamp, dtype=np.int64)
+    now = np.broadcast_to(np.asarray(now, dtype=np.int64), created.shape)
+
+    # int64 only if the sum of all deposits can't overflow
+    deposit_amount = [int(v) for v in deposit_amount]
+    int64 = sum(deposit_amount) <= INT64_MAX
+    target_amount = amount_array(target_amount, int64)
+    monthly_remittrance = amount_array(monthly_remittrance, int64)
+    deposit_amount = amount_array(deposit_amount, int64)
+    dtype = deposit_amount.dtype if int64 else object
+    n_accounts = len(created)
+
+    # current month of each account, and if now is just on its first second
+    current = month_index(created, now)
+    on_boundary = add_months(created, current - 1) == now
+
+    # bucket deposits by (account, month)
+    visible = deposit_timestamp <= now[deposit_account]
+    deposit_account = deposit_account[visible]
+    deposit_month = month_index(created[deposit_account], deposit_timestamp[visible])
+    deposit_amount = deposit_amount[visible]
+
+    n_months = int(current.max()) if n_accounts else 0
+    monthly = np.zeros((n_accounts, n_months + 1), dtype=dtype)
+    np.add.at(monthly, (deposit_account, deposit_month), deposit_amount)
+
+    received = monthly.sum(axis=1)
+    total = np.zeros(n_accounts, dtype=dtype)
+    for k in range(1, n_months + 1):
+        month_total = monthly[:, k]
+        great = (month_total >= monthly_remittrance) | (total >= target_amount)
+        closing = total + month_total
+        closing = np.where(great, closing, closing - closing // 5)
+
+        in_progress = (k == current) & ~on_boundary  # current month, no penalty yet
+        total = np.where(k > current, total, np.where(in_progress, total + month_total, closing))
+
+    return Result(total, received, received - total)
+
+
+def load_indexer(database):
+    """Accounts and deposits of the indexer database, as arrays for evaluate()"""
+    db = sqlite3.connect(database)
+    accounts = db.execute(
+        'SELECT id, token, created, target_amount, monthly_remittrance FROM accounts WHERE disabled = 0 ORDER BY id'
+    ).fetchall()
+    position = {row[0]: i for i, row in enumerate(accounts)}
+
+    deposits = [row for row in db.execute('SELECT id, timestamp, amount FROM deposits ORDER BY block, log_index')
+                if row[0] in position]
+
+    return {
+        'id': [row[0] for row in accounts],
+        'token': [row[1] for row in accounts],
+        'created': [row[2] for row in accounts],
+        'target_amount': [int(row[3]) for row in accounts],
+        'monthly_remittrance': [int(row[4]) for row in accounts],
+        'deposit_account': [position[row[0]] for row in deposits],
+        'deposit_timestamp': [row[1] for row in deposits],
+        'deposit_amount': [int(row[2]) for row in deposits],
+    }
+
+
+def main(database, now=None):
+    now = int(time.time()) if now is None else int(now)
+    data = load_indexer(database)
+    result = evaluate(data['created'], data['target_amount'], data['monthly_remittrance'],
+                      data['deposit_account'], data['deposit_timestamp'], data['deposit_amount'], now)
+
+    # forfeited amount per token
+    forfeited = {}
+    for token, amount in zip(data['token'], result.forfeited):
+        forfeited[token] = forfeited.get(token, 0) + int(amount)
+
+    print(f'{len(data["id"])} active accounts at {now}')
+    for token, amount in sorted(forfeited.items()):
+        print(f'{token}: forfeited {amount}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,88 @@
+"""Off-chain version of the HardcoreBank monthly rules.
+
+Dates are calculated in the same way as BokkyPooBahsDateTimeLibrary, so
+the results are identical to HardcoreBank.balanceOf.
+"""
+
+SECONDS_PER_DAY = 24 * 60 * 60
+OFFSET19700101 = 2440588
+
+
+def days_from_date(year: int, month: int, day: int) -> int:
+    _month = -1 if month <= 2 else 0  # (month - 14) / 12, truncated like solidity
+    days = (day - 32075 + 1461 * (year + 4800 + _month) // 4
+            + 367 * (month - 2 - _month * 12) // 12
+            - 3 * ((year + 4900 + _month) // 100) // 4
+            - OFFSET19700101)
+    return days
+
+
+def days_to_date(days: int) -> tuple:
+    L = days + 68569 + OFFSET19700101
+    N = 4 * L // 146097
+    L = L - (146097 * N + 3) // 4
+    _year = 4000 * (L + 1) // 1461001
+    L = L - 1461 * _year // 4 + 31
+    _month = 80 * L // 2447
+    _day = L - 2447 * _month // 80
+    L = _month // 11
+    _month = _month + 2 - 12 * L
+    _year = 100 * (N - 49) + _year + L
+    return _year, _month, _day
+
+
+def days_in_month(year: int, month: int) -> int:
+    if month in (1, 3, 5, 7, 8, 10, 12):
+        return 31
+    if month != 2:
+        return 30
+    leap = (year % 4 == 0 and year % 100 != 0) or year % 400 == 0
+    return 29 if leap else 28
+
+
+def add_months(timestamp: int, months: int) -> int:
+    year, month, day = days_to_date(timestamp // SECONDS_PER_DAY)
+    month += months
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    day = min(day, days_in_month(year, month))
+    return days_from_date(year, month, day) * SECONDS_PER_DAY + timestamp % SECONDS_PER_DAY
+
+
+def close_month(total: int, month_total: int, target_amount: int, monthly_remittrance: int) -> int:
+    # great month, or target already reached
+    if month_total >= monthly_remittrance or total >= target_amount:
+        return total + month_total
+
+    # failed month: lose 20%
+    total += month_total
+    return total - total // 5
+
+
+def balance_of(created: int, target_amount: int, monthly_remittrance: int, deposits, now: int) -> int:
+    """deposits: (timestamp, amount) sorted by timestamp"""
+    deposits = list(deposits)
+
+    total = 0
+    ri = 0
+    add_month = 1
+    while True:
+        next_month = add_months(created, add_month)
+        current_month = add_months(created, add_month - 1)
+
+        month_total = 0
+        while ri < len(deposits) and deposits[ri][0] < next_month:
+            month_total += deposits[ri][1]
+            ri += 1
+
+        if current_month < now < next_month:
+            # current month
+            total += month_total
+        else:
+            total = close_month(total, month_total, target_amount, monthly_remittrance)
+
+        add_month += 1
+        if next_month > now:
+            break
+
+    return total
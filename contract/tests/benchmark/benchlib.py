@@ -0,0 +1,100 @@
+import csv
+import glob
+import json
+import os
+import statistics
+import time
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+REPORT_DIR = 'reports'
+
+
+class Benchmark:
+    def __init__(self, baseline, threshold, require_baseline=True):
+        self.baseline = baseline  # key => gas
+        self.threshold = threshold
+        self.require_baseline = require_baseline  # fail if a key is missing in the baseline
+        self.results = []
+
+    @staticmethod
+    def key(function, params):
+        return function + '[' + ','.join(f'{k}={v}' for k, v in sorted(params.items())) + ']'
+
+    def record(self, function, gas, latency=None, **params):
+        key = self.key(function, params)
+        self.results.append({
+            'key': key,
+            'function': function,
+            'params': params,
+            'gas': gas,
+            'latency': latency,
+        })
+
+        # gas is deterministic, latency is only reported
+        expected = self.baseline.get(key)
+        if expected is None:
+            assert not self.require_baseline, \
+                f'{key}: no baseline, run with --benchmark-update to record it'
+        else:
+            assert gas <= expected * (1 + self.threshold), \
+                f'{key}: gas {gas} exceeds baseline {expected} (+{self.threshold:.0%})'
+
+    def save(self, directory, name='benchmark'):
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, f'{name}.json'), 'w') as f:
+            json.dump(self.results, f, indent=2)
+
+        with open(os.path.join(directory, f'{name}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['key', 'function', 'params', 'gas', 'baseline', 'latency'])
+            for r in self.results:
+                params = ' '.join(f'{k}={v}' for k, v in sorted(r['params'].items()))
+                writer.writerow([r['key'], r['function'], params, r['gas'],
+                                 self.baseline.get(r['key'], ''), r['latency'] or ''])
+
+
+def _partial_baselines(directory):
+    return glob.glob(os.path.join(directory, 'baseline-*.json'))
+
+
+def save_partial_baseline(results, name, directory=REPORT_DIR):
+    # each process (xdist worker) writes its own file, merged once by merge_baseline
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'baseline-{name}.json'), 'w') as f:
+        json.dump({r['key']: r['gas'] for r in results}, f)
+
+
+def clear_partial_baselines(directory=REPORT_DIR):
+    for path in _partial_baselines(directory):
+        os.remove(path)
+
+
+def merge_baseline(directory=REPORT_DIR, baseline=BASELINE):
+    """Merge the partial baselines into `baseline`, keeping keys which were not measured"""
+    paths = _partial_baselines(directory)
+    if not paths:
+        return
+
+    merged = {}
+    if os.path.exists(baseline):
+        with open(baseline) as f:
+            merged = json.load(f)
+    for path in sorted(paths):
+        with open(path) as f:
+            merged.update(json.load(f))
+
+    with open(baseline, 'w') as f:
+        json.dump(merged, f, indent=2, sort_keys=True)
+    clear_partial_baselines(directory)
+
+
+def measure_latency(call, *args, repeat=5):
+    # median wall-clock time of eth_call [s]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
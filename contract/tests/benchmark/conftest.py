@@ -0,0 +1,31 @@
+import json
+import os
+import warnings
+
+import pytest
+
+from benchlib import BASELINE, REPORT_DIR, Benchmark, save_partial_baseline
+
+
+@pytest.fixture(scope='session')
+def benchmark(request):
+    config = request.config
+    update = config.getoption('--benchmark-update')
+
+    baseline = {}
+    has_baseline = os.path.exists(BASELINE)
+    if has_baseline and not update:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    elif not update:
+        # nothing to compare with until the first --benchmark-update is committed
+        warnings.warn(f'{BASELINE} not found, gas is only reported; run with --benchmark-update and commit it')
+
+    bench = Benchmark(baseline, config.getoption('--benchmark-threshold'), require_baseline=has_baseline and not update)
+    yield bench
+
+    # xdist workers write their own report and baseline, merged by the controller (see tests/conftest.py)
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    bench.save(REPORT_DIR, f'benchmark-{worker}' if worker else 'benchmark')
+    if update:
+        save_partial_baseline(bench.results, worker or 'main')
@@ -0,0 +1,101 @@
+from brownie import accounts
+from brownie import HardcoreBank, SampleToken
+from brownie import convert
+from eth_abi import encode_abi
+import pytest
+import testlib
+
+from benchlib import measure_latency
+
+
+pytestmark = pytest.mark.benchmark
+
+MONTH = 60*60*24*31
+AMOUNT = 10**10
+
+
+def deploy():
+    st = SampleToken.deploy({'from': accounts[0]})
+    c = HardcoreBank.deploy({'from': accounts[0]})
+    return st, c
+
+
+def create(c, st, target_amount=1, monthly=10**5):
+    tx = c.createAccount('Buy House', 'Saving up to buy a house', st.address,
+                         target_amount, monthly, {'from': accounts[1]})
+    return tx.events['AccountCreated']['id']
+
+
+def record_balance(benchmark, c, id, **params):
+    gas = c.balanceOf.estimate_gas(id, {'from': accounts[1]})
+    latency = measure_latency(c.balanceOf.call, id, {'from': accounts[1]})
+    benchmark.record('balanceOf', gas, latency, **params)
+
+
+@pytest.mark.parametrize('deposits', [1, 10, 100])
+def test_deposits(deploy_erc1820_register, benchmark, deposits):
+    st, c = deploy()
+    id = create(c, st)
+
+    for _ in range(deposits):
+        tx = st.send(c.address, AMOUNT, convert.to_bytes(id), {'from': accounts[0]})
+    benchmark.record('tokensReceived', tx.gas_used, deposits=deposits)
+
+    record_balance(benchmark, c, id, deposits=deposits)
+
+    tx = c.withdraw(id, {'from': accounts[1]})
+    benchmark.record('withdraw', tx.gas_used, deposits=deposits)
+
+
+@pytest.mark.parametrize('months', [1, 12, 36])
+@pytest.mark.parametrize('history', ['monthly', 'idle'])
+def test_months(deploy_erc1820_register, benchmark, months, history):
+    st, c = deploy()
+    id = create(c, st)
+
+    # 'monthly': one deposit per month, 'idle': no deposit after the first month
+    st.send(c.address, AMOUNT, convert.to_bytes(id), {'from': accounts[0]})
+    for _ in range(months):
+        testlib.increaseTime(MONTH)
+        if history == 'monthly':
+            st.send(c.address, AMOUNT, convert.to_bytes(id), {'from': accounts[0]})
+    testlib.increaseTime(MONTH)
+
+    record_balance(benchmark, c, id, months=months, history=history)
+
+    tx = st.send(c.address, AMOUNT, convert.to_bytes(id), {'from': accounts[0]})
+    benchmark.record('tokensReceived', tx.gas_used, months=months, history=history)
+
+    tx = c.withdraw(id, {'from': accounts[1]})
+    benchmark.record('withdraw', tx.gas_used, months=months, history=history)
+
+
+@pytest.mark.parametrize('accounts_per_token', [1, 10, 50])
+def test_accounts_per_token(deploy_erc1820_register, benchmark, accounts_per_token):
+    st, c = deploy()
+    ids = [create(c, st, target_amount=10**18) for _ in range(accounts_per_token)]
+
+    data = encode_abi(['uint256[]', 'uint256[]'], [ids, [AMOUNT] * len(ids)])
+    tx = st.send(c.address, AMOUNT * len(ids), data, {'from': accounts[0]})
+    benchmark.record('tokensReceived', tx.gas_used, batch=accounts_per_token)
+
+    testlib.increaseTime(2 * MONTH)
+
+    gas = c.collectedAmount.estimate_gas(st.address, {'from': accounts[0]})
+    latency = measure_latency(c.collectedAmount.call, st.address, {'from': accounts[0]})
+    benchmark.record('collectedAmount', gas, latency, accounts_per_token=accounts_per_token)
+
+    tx = c.collect(st.address, {'from': accounts[0]})
+    benchmark.record('collect', tx.gas_used, accounts_per_token=accounts_per_token)
+
+
+@pytest.mark.parametrize('withdrawals', [1, 10])
+def test_withdrawMany(deploy_erc1820_register, benchmark, withdrawals):
+    st, c = deploy()
+    ids = [create(c, st) for _ in range(withdrawals)]
+
+    data = encode_abi(['uint256[]', 'uint256[]'], [ids, [AMOUNT] * len(ids)])
+    st.send(c.address, AMOUNT * len(ids), data, {'from': accounts[0]})
+
+    tx = c.withdrawMany(ids, {'from': accounts[1]})
+    benchmark.record('withdrawMany', tx.gas_used, withdrawals=withdrawals)
@@ -1,15 +1,17 @@
 from os import kill
 from brownie import accounts
-from brownie import HardcoreBank, SampleToken
 from brownie import convert
+from eth_abi import encode_abi
 import brownie
 import testlib
 import math
 import time
 
+from scripts import rules
 
-def test_createAccount_getAccount(deploy_erc1820_register):
-    c = HardcoreBank.deploy({'from': accounts[0]})
+
+def test_createAccount_getAccount(bank):
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -39,8 +41,8 @@ def test_createAccount_getAccount(deploy_erc1820_register):
     assert len(c.getAccounts({'from': accounts[0]})) == 0
 
 
-def test_createAccount_getAccount_many(deploy_erc1820_register):
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_createAccount_getAccount_many(bank):
+    c = bank
 
     # many account
     name = ['hoge','fuga', 'piyo']
@@ -69,8 +71,16 @@ def test_createAccount_getAccount_many(deploy_erc1820_register):
         assert config_head[6] == monthly[i]
 
 
-def test_disable(deploy_erc1820_register):
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_createAccount_overflow(bank):
+    c = bank
+
+    token = '0xdAC17F958D2ee523a2206206994597C13D831ec7'
+    with brownie.reverts():
+        c.createAccount('Buy House', 'Saving up to buy a house', token, 2**128, 1e5, {'from': accounts[1]})
+
+
+def test_disable(bank):
+    c = bank
 
     # many account
     name = ['hoge','fuga', 'piyo']
@@ -98,9 +108,56 @@ def test_disable(deploy_erc1820_register):
     assert name[1] not in [a[2] for a in accounts_list]
 
 
-def test_tokenReceived(deploy_erc1820_register):
-    st = SampleToken.deploy({'from': accounts[0]})
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_events(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    tx = c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5, {'from': accounts[1]})
+    event = tx.events['AccountCreated']
+    assert event['id'] == 0
+    assert event['owner'] == accounts[1]
+    assert event['token'] == st.address
+    assert event['subject'] == 'Buy House'
+
+    tx = st.send(c.address, 1e10, convert.to_bytes(0), {'from': accounts[0]})
+    event = tx.events['Deposited']
+    assert event['id'] == 0
+    assert event['from'] == accounts[0]
+    assert event['amount'] == 1e10
+
+    tx = c.disable(0, {'from': accounts[1]})
+    assert tx.events['Disabled']['id'] == 0
+
+
+def test_getAccounts_page(bank):
+    c = bank
+
+    token = '0x2AC170958D2ee523a225620A994597C1AD831ec9'
+    for i in range(5):
+        c.createAccount(f'name{i}', f'description{i}', token, 1e18, 1e5, {'from': accounts[0]})
+    c.disable(1, {'from': accounts[0]})
+
+    page, cursor = c.getAccounts(0, 2, {'from': accounts[0]})
+    assert [a[0] for a in page] == [0, 2]
+    assert cursor == 3
+
+    page, cursor = c.getAccounts(cursor, 2, {'from': accounts[0]})
+    assert [a[0] for a in page] == [3, 4]
+    assert cursor == 0
+
+    page, cursor = c.getAccounts(0, 2, {'from': accounts[1]})
+    assert len(page) == 0
+    assert cursor == 0
+
+    # no progress, so no cursor to follow
+    page, cursor = c.getAccounts(2, 0, {'from': accounts[0]})
+    assert len(page) == 0
+    assert cursor == 0
+
+
+def test_tokenReceived(bank, sample_token):
+    st = sample_token
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -119,9 +176,136 @@ def test_tokenReceived(deploy_erc1820_register):
     assert recv[1] == amount
 
 
-def test_tokenReceived_fail(deploy_erc1820_register):
-    st = SampleToken.deploy({'from': accounts[0]})
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_tokenReceived_batch(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    for _ in range(3):
+        c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5, {'from': accounts[1]})
+
+    ids = [0, 2]
+    amounts = [1e10, 3e10]
+    data = encode_abi(['uint256[]', 'uint256[]'], [ids, [int(a) for a in amounts]])
+    st.send(c.address, sum(amounts), data, {'from': accounts[0]})
+
+    assert c.balanceOf(0, {'from': accounts[1]}) == amounts[0]
+    assert c.balanceOf(1, {'from': accounts[1]}) == 0
+    assert c.balanceOf(2, {'from': accounts[1]}) == amounts[1]
+    assert c.tokensRecvList(2, {'from': accounts[1]})[0][0] == accounts[0]
+
+    # sum of amounts doesn't match
+    with brownie.reverts():
+        st.send(c.address, sum(amounts) + 1, data, {'from': accounts[0]})
+
+    # length doesn't match
+    data = encode_abi(['uint256[]', 'uint256[]'], [ids, [int(amounts[0])]])
+    with brownie.reverts():
+        st.send(c.address, amounts[0], data, {'from': accounts[0]})
+
+
+def test_tokensRecvList_page(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5, {'from': accounts[1]})
+
+    id = 0
+    amounts = [1e10, 2e10, 3e10]
+    for amount in amounts:
+        st.send(c.address, amount, convert.to_bytes(id), {'from': accounts[0]})
+
+    page, cursor = c.tokensRecvList(id, 0, 2, {'from': accounts[1]})
+    assert [recv[1] for recv in page] == amounts[:2]
+    assert cursor == 2
+
+    page, cursor = c.tokensRecvList(id, cursor, 2, {'from': accounts[1]})
+    assert [recv[1] for recv in page] == amounts[2:]
+    assert cursor == 0
+
+    page, cursor = c.tokensRecvList(id, 1, 0, {'from': accounts[1]})
+    assert len(page) == 0
+    assert cursor == 0
+
+    with brownie.reverts():
+        c.tokensRecvList(id, 0, 2, {'from': accounts[0]})
+
+
+def test_compact(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5, {'from': accounts[1]})
+
+    id = 0
+    amounts = [1e10, 2e10, 3e10]
+    for amount in amounts:
+        st.send(c.address, amount, convert.to_bytes(id), {'from': accounts[0]})
+
+    testlib.increaseTime(60*60*24*31)  # skip 31days
+    st.send(c.address, 4e10, convert.to_bytes(id), {'from': accounts[0]})
+    balance = c.balanceOf(id, {'from': accounts[1]})
+
+    with brownie.reverts():
+        c.compact(id, 10, {'from': accounts[2]})
+
+    # stops after 2 recv-transactions, the 1st month is not compacted yet
+    tx = c.compact(id, 2, {'from': accounts[1]})
+    assert tx.events['Compacted']['months'] == 0
+    assert tx.events['Compacted']['count'] == 2
+    assert [recv[1] for recv in c.tokensRecvList(id, {'from': accounts[1]})] == [3e10, 4e10]
+    assert c.tokensRecvSummary(id, {'from': accounts[1]}) == (0, sum(amounts[:2]), 2, 0)
+
+    # resume
+    tx = c.compact(id, 2, {'from': accounts[1]})
+    assert tx.events['Compacted']['months'] == 1
+    assert tx.events['Compacted']['count'] == 1
+
+    # recv-transactions of the 1st month are folded into the summary
+    assert [recv[1] for recv in c.tokensRecvList(id, {'from': accounts[1]})] == [4e10]
+    page, cursor = c.tokensRecvList(id, 0, 10, {'from': accounts[1]})
+    assert [recv[1] for recv in page] == [4e10]
+    assert cursor == 0
+    assert c.tokensRecvSummary(id, {'from': accounts[1]}) == (sum(amounts), sum(amounts), 3, 1)
+    assert c.balanceOf(id, {'from': accounts[1]}) == balance
+
+    # grand owner can compact too, nothing more to fold in the current month
+    tx = c.compact(id, 10, {'from': accounts[0]})
+    assert tx.events['Compacted']['count'] == 0
+    assert len(c.tokensRecvList(id, {'from': accounts[1]})) == 1
+
+
+def test_month_index_end_of_month(bank, sample_token):
+    st = sample_token
+    c = bank
+    DAY = 60*60*24
+
+    # created on Jan 31, so the 1st month ends on Feb 28 and the 2nd on Mar 31
+    testlib.setTime(rules.days_from_date(2031, 1, 31)*DAY + 12*60*60)
+    tx = c.createAccount('Buy House', 'Saving up to buy a house', st.address, 10**18, 10**5, {'from': accounts[1]})
+    created = tx.timestamp
+    id = 0
+
+    deposits = []
+    for time_, amount in [
+        (rules.add_months(created, 1) - DAY, 10**4),  # Feb 27, failed 1st month
+        (rules.add_months(created, 1) + 60*60, 10**5),  # Feb 28
+        (rules.add_months(created, 2) - DAY, 10**5),  # Mar 30
+    ]:
+        testlib.setTime(time_)
+        tx = st.send(c.address, amount, convert.to_bytes(id), {'from': accounts[0]})
+        deposits.append((tx.timestamp, amount))
+
+    assert [recv[3] for recv in c.tokensRecvList(id, {'from': accounts[1]})] == [0, 1, 1]
+    assert c.balanceOf(id, {'from': accounts[1]}) == rules.balance_of(created, 10**18, 10**5, deposits, testlib.latest_timestamp())
+    assert c.balanceOf(id, {'from': accounts[1]}) == 10**4 * 4 // 5 + 2 * 10**5
+
+    testlib.setTime(rules.add_months(created, 4) - DAY)  # 3rd month failed
+    assert c.balanceOf(id, {'from': accounts[1]}) == rules.balance_of(created, 10**18, 10**5, deposits, testlib.latest_timestamp())
+
+
+def test_tokenReceived_fail(bank, sample_token):
+    st = sample_token
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -142,9 +326,9 @@ def test_tokenReceived_fail(deploy_erc1820_register):
     assert len(c.tokensRecvList(0, {'from': accounts[1]})) == 0
 
 
-def test_balanceOf(deploy_erc1820_register):
-    st = SampleToken.deploy({'from': accounts[0]})
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_balanceOf(bank, sample_token):
+    st = sample_token
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -164,9 +348,9 @@ def test_balanceOf(deploy_erc1820_register):
     assert balance == (amount_0 + amount_1)
 
 
-def test_balanceOf_multi(deploy_erc1820_register):
-    st = SampleToken.deploy({'from': accounts[0]})
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_balanceOf_multi(bank, sample_token):
+    st = sample_token
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -204,10 +388,10 @@ def test_balanceOf_multi(deploy_erc1820_register):
     assert balance == math.ceil(math.ceil((amount_0+amount_1+amount_2) * 0.8) * 0.8)
 
 
-def test_balanceOf_over_targetAmount(deploy_erc1820_register):
+def test_balanceOf_over_targetAmount(bank, sample_token):
     
-    st = SampleToken.deploy({'from': accounts[0]})
-    c = HardcoreBank.deploy({'from': accounts[0]})
+    st = sample_token
+    c = bank
 
     name = 'Buy House'
     description = 'Saving up to buy a house'
@@ -231,11 +415,99 @@ def test_balanceOf_over_targetAmount(deploy_erc1820_register):
     assert balance == amount_0 + amount_1
 
 
-def test_collectedAmount(deploy_erc1820_register):
-    st_1 = SampleToken.deploy({'from': accounts[0]})
-    st_2 = SampleToken.deploy({'from': accounts[0]})
+def test_balanceOf_checkpoint(bank, sample_token):
+    st = sample_token
+    c = bank
 
-    c = HardcoreBank.deploy({'from': accounts[0]})
+    name = 'Buy House'
+    description = 'Saving up to buy a house'
+    token = st.address
+    total_amount = 1e18
+    monthly = 1e5
+
+    c.createAccount(name, description, token, total_amount, monthly, {'from': accounts[1]})
+
+    id = 0
+    amount_0 = 1e10
+    st.send(c.address, amount_0, convert.to_bytes(id), {'from': accounts[0]})
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months, 2nd month failed
+    amount_1 = 1e15
+    st.send(c.address, amount_1, convert.to_bytes(id), {'from': accounts[0]})  # settle checkpoint
+    balance = c.balanceOf(id, {'from': accounts[1]})
+    assert balance == math.ceil(amount_0 * 0.8) + amount_1
+
+
+def test_getAccountsWithBalances(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    name = 'Buy House'
+    description = 'Saving up to buy a house'
+    c.createAccount(name, description, st.address, 1e18, 1e5, {'from': accounts[1]})
+    c.createAccount(name, description, st.address, 1e18, 1e5, {'from': accounts[1]})
+    c.createAccount(name, description, st.address, 1e10, 1e5, {'from': accounts[1]})
+    c.disable(1, {'from': accounts[1]})
+
+    st.send(c.address, 1e10, convert.to_bytes(0), {'from': accounts[0]})
+    st.send(c.address, 1e4, convert.to_bytes(2), {'from': accounts[0]})
+
+    result = c.getAccountsWithBalances({'from': accounts[1]})
+    assert [r[0][0] for r in result] == [0, 2]
+    assert result[0][0][2] == name
+    assert result[0][1] == 1e10  # balance
+    assert result[0][2] == 1e10  # monthTotal
+    assert result[0][3] == 1  # Achieved
+    assert result[1][3] == 0  # Pending
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months
+    st.send(c.address, 1e10, convert.to_bytes(2), {'from': accounts[0]})
+    result = c.getAccountsWithBalances({'from': accounts[1]})
+    assert result[0][1] == math.ceil(1e10 * 0.8)
+    assert result[0][2] == 0
+    assert result[0][3] == 0  # Pending
+    assert result[1][2] == 1e10
+    assert result[1][3] == 1  # Achieved
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months
+    result = c.getAccountsWithBalances({'from': accounts[1]})
+    assert result[1][1] == c.balanceOf(2, {'from': accounts[1]})
+    assert result[1][3] == 2  # Exempted
+
+    assert len(c.getAccountsWithBalances({'from': accounts[0]})) == 0
+
+
+def test_getAccountsWithBalances_same_second(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    # create and deposit in one block, and read it in the same second:
+    # the 1st month is closed (20% penalty) on the first second of the account
+    testlib.rpc().call('miner_stop')
+    try:
+        c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5,
+                        {'from': accounts[1], 'gas_limit': 1000000, 'required_confs': 0})
+        st.send(c.address, 1e4, convert.to_bytes(0),
+                {'from': accounts[0], 'gas_limit': 1000000, 'required_confs': 0})
+        testlib.setTime(testlib.latest_timestamp() + 10)
+    finally:
+        testlib.rpc().call('miner_start')
+
+    created = c.getAccounts({'from': accounts[1]})[0][7]
+    now = testlib.latest_timestamp()
+    assert created == now
+
+    result = c.getAccountsWithBalances({'from': accounts[1]})
+    assert result[0][1] == rules.balance_of(created, 10**18, 10**5, [(created, 10**4)], now)
+    assert result[0][2] == 1e4  # monthTotal
+    assert result[0][3] == 0  # Pending
+
+
+def test_collectedAmount(bank, sample_token, sample_token_2):
+    st_1 = sample_token
+    st_2 = sample_token_2
+
+    c = bank
     name = 'Buy House'
     description = 'Saving up to buy a house'
     token = st_1.address
@@ -272,11 +544,32 @@ def test_collectedAmount(deploy_erc1820_register):
     assert math.floor(1e10*0.2*2) == c.collectedAmount(st_2.address, {'from': accounts[0]})
 
 
-def test_withdraw_0():
-    st = SampleToken.deploy({'from': accounts[0]})
+def test_collectedAmount_disabled(bank, sample_token):
+    st = sample_token
+
+    c = bank
+    name = 'Buy House'
+    description = 'Saving up to buy a house'
+    token = st.address
+    total_amount = 1e18
+    monthly = 1e5
+    for id in range(3):
+        c.createAccount(name, description, token, total_amount, monthly, {'from': accounts[1]})
+        st.send(c.address, 1e10, convert.to_bytes(id), {'from': accounts[0]})
+
+    # disabled account is collected entirely
+    c.disable(1, {'from': accounts[1]})
+    assert 1e10 == c.collectedAmount(st.address, {'from': accounts[0]})
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months
+    assert 1e10 + math.floor(1e10*0.2*2) == c.collectedAmount(st.address, {'from': accounts[0]})
+
+
+def test_withdraw_0(bank, sample_token):
+    st = sample_token
     initial_balance = st.balanceOf(accounts[0])
 
-    c = HardcoreBank.deploy({'from': accounts[0]})
+    c = bank
     name = 'Buy House'
     description = 'Saving up to buy a house'
     token = st.address
@@ -294,10 +587,10 @@ def test_withdraw_0():
     assert 1e18+1e10 == st.balanceOf(accounts[1])
 
 
-def test_withdraw_1():
-    st = SampleToken.deploy({'from': accounts[0]})
+def test_withdraw_1(bank, sample_token):
+    st = sample_token
 
-    c = HardcoreBank.deploy({'from': accounts[0]})
+    c = bank
     name = 'Buy House'
     description = 'Saving up to buy a house'
     token = st.address
@@ -322,11 +615,66 @@ def test_withdraw_1():
     assert math.ceil(0.8*(total_amount//2)) + total_amount == st.balanceOf(accounts[1])
 
 
-def test_collect():
-    st = SampleToken.deploy({'from': accounts[0]})
+def test_withdrawMany(bank, sample_token, sample_token_2):
+    st_1 = sample_token
+    st_2 = sample_token_2
+    c = bank
+
+    total_amount = 10**18
+    monthly = 10**5
+    tokens = [st_1, st_1, st_2, st_1]
+    for id, st in enumerate(tokens):
+        c.createAccount('Buy House', 'Saving up to buy a house', st.address, total_amount, monthly, {'from': accounts[1]})
+        st.send(c.address, total_amount + id, convert.to_bytes(id), {'from': accounts[0]})
+    c.createAccount('Buy House', 'Saving up to buy a house', st_1.address, total_amount, monthly, {'from': accounts[2]})
+    st_1.send(c.address, total_amount, convert.to_bytes(4), {'from': accounts[0]})
+
+    # not owner
+    with brownie.reverts():
+        c.withdrawMany([0, 4], {'from': accounts[1]})
+
+    tx = c.withdrawMany([0, 1, 2, 3], {'from': accounts[1]})
+    assert [e['id'] for e in tx.events['Withdrawn']] == [0, 1, 2, 3]
+    assert st_1.balanceOf(accounts[1]) == 3*total_amount + 0 + 1 + 3
+    assert st_2.balanceOf(accounts[1]) == total_amount + 2
+    assert len(c.getAccounts({'from': accounts[1]})) == 0
+
+    # already withdrawn
+    with brownie.reverts():
+        c.withdrawMany([0], {'from': accounts[1]})
+
+
+def test_withdraw_collect(bank, sample_token):
+    st = sample_token
+    c = bank
+    initial_amount = st.balanceOf(accounts[0])
+
+    total_amount = 10**18
+    monthly = 10**5
+    c.createAccount('Buy House', 'Saving up to buy a house', st.address, total_amount, monthly, {'from': accounts[1]})
+    st.send(c.address, total_amount//2, convert.to_bytes(0), {'from': accounts[0]})
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months, 20% of the 1st deposit is forfeited
+    st.send(c.address, total_amount, convert.to_bytes(0), {'from': accounts[0]})
+    c.createAccount('Buy House', 'Saving up to buy a house', st.address, total_amount, monthly, {'from': accounts[2]})
+    st.send(c.address, 10**10, convert.to_bytes(1), {'from': accounts[0]})
+
+    c.withdraw(0, {'from': accounts[1]})
+    forfeited = total_amount//2 - total_amount//2 * 4 // 5
+    assert st.balanceOf(accounts[1]) == total_amount + total_amount//2 - forfeited
+
+    # withdrawn balance is not collected again
+    assert c.collectedAmount(st.address, {'from': accounts[0]}) == forfeited
+    c.collect(st.address, {'from': accounts[0]})
+    assert st.balanceOf(accounts[0]) == initial_amount - total_amount - total_amount//2 - 10**10 + forfeited
+    assert st.balanceOf(c.address) == 10**10  # deposit of the other account
+
+
+def test_collect(bank, sample_token):
+    st = sample_token
     initial_amount = st.balanceOf(accounts[0])
 
-    c = HardcoreBank.deploy({'from': accounts[0]})
+    c = bank
     name = 'Buy House'
     description = 'Saving up to buy a house'
     token = st.address
@@ -343,3 +691,56 @@ def test_collect():
     testlib.increaseTime(60*60*24*62)
     c.collect(st.address)
     assert initial_amount - (total_amount//2 * 0.8) == st.balanceOf(accounts[0])
+
+    # already collected
+    assert c.collectedAmount(st.address, {'from': accounts[0]}) == 0
+    with brownie.reverts():
+        c.collect(st.address)
+    c.collectMany([st.address], {'from': accounts[0]})
+    assert initial_amount - (total_amount//2 * 0.8) == st.balanceOf(accounts[0])
+
+
+def test_collectMany(bank, sample_token, sample_token_2):
+    st_1 = sample_token
+    st_2 = sample_token_2
+    initial_amount_1 = st_1.balanceOf(accounts[0])
+    initial_amount_2 = st_2.balanceOf(accounts[0])
+
+    c = bank
+    name = 'Buy House'
+    description = 'Saving up to buy a house'
+    total_amount = 1e18
+    monthly = 1e5
+
+    c.createAccount(name, description, st_1.address, total_amount, monthly, {'from': accounts[1]})
+    st_1.send(c.address, total_amount//2, convert.to_bytes(0), {'from': accounts[0]})
+    c.createAccount(name, description, st_2.address, total_amount, monthly, {'from': accounts[1]})
+    st_2.send(c.address, total_amount//4, convert.to_bytes(1), {'from': accounts[0]})
+
+    with brownie.reverts():
+        c.collectMany([st_1.address, st_2.address], {'from': accounts[1]})
+
+    testlib.increaseTime(60*60*24*62)
+    c.collectMany([st_1.address, st_2.address], {'from': accounts[0]})
+    assert initial_amount_1 - (total_amount//2 * 0.8) == st_1.balanceOf(accounts[0])
+    assert initial_amount_2 - (total_amount//4 * 0.8) == st_2.balanceOf(accounts[0])
+
+
+def test_collectMany_skip_zero(bank, sample_token, sample_token_2):
+    st_1 = sample_token
+    st_2 = sample_token_2
+    c = bank
+    total_amount = 10**18
+    monthly = 10**5
+
+    c.createAccount('Buy House', 'Saving up to buy a house', st_1.address, total_amount, monthly, {'from': accounts[1]})
+    st_1.send(c.address, total_amount//2, convert.to_bytes(0), {'from': accounts[0]})
+    testlib.increaseTime(60*60*24*62)
+
+    # nothing is forfeited for st_2 yet
+    c.createAccount('Buy House', 'Saving up to buy a house', st_2.address, total_amount, monthly, {'from': accounts[1]})
+    st_2.send(c.address, total_amount//4, convert.to_bytes(1), {'from': accounts[0]})
+
+    tx = c.collectMany([st_1.address, st_2.address], {'from': accounts[0]})
+    assert [e['token'] for e in tx.events['Collected']] == [st_1.address]
+    assert tx.events['Collected'][0]['amount'] == total_amount//2 - total_amount//2 * 4 // 5
@@ -0,0 +1,41 @@
+from brownie import accounts
+from brownie import convert
+from brownie import web3
+import asyncio
+import pytest
+
+from scripts.client import Client, RPCError
+
+
+def test_client(bank, sample_token):
+    st = sample_token
+    c = bank
+
+    amounts = [1e10, 2e10, 3e10]
+    for id, amount in enumerate(amounts):
+        c.createAccount('Buy House', 'Saving up to buy a house', st.address, 1e18, 1e5, {'from': accounts[1]})
+        st.send(c.address, amount, convert.to_bytes(id), {'from': accounts[0]})
+    c.disable(1, {'from': accounts[1]})
+
+    async def read():
+        async with Client(web3.provider.endpoint_uri, c.address, ttl=60) as client:
+            balances = dict([b async for b in client.balances([0, 2], accounts[1])])
+            assert balances == {0: amounts[0], 2: amounts[2]}
+
+            # same block, from the cache
+            requests = client.requests
+            assert dict([b async for b in client.balances([0, 2], accounts[1])]) == balances
+            assert client.requests == requests
+
+            assert await client.is_owner(0, accounts[1])
+            assert not await client.is_owner(0, accounts[2])
+
+            assert [a[0] for a in await client.get_accounts(accounts[1])] == [0, 2]
+            page, cursor = await client.get_accounts(accounts[1], 0, 1)
+            assert [a[0] for a in page] == [0]
+            assert cursor == 1
+
+            with pytest.raises(RPCError):
+                await client.balance_of(0, accounts[2])
+
+    asyncio.run(read())
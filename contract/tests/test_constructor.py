@@ -1,18 +1,17 @@
 from brownie import accounts
-from brownie import HardcoreBank
 
 import testlib
 
 
-def test_init_owner(deploy_erc1820_register):
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_init_owner(bank):
+    c = bank
 
     # owner check
     assert c.isGrandOwner({'from': accounts[0]}) == True
     assert c.isGrandOwner({'from': accounts[1]}) == False
  
-def test_init_registory(deploy_erc1820_register):
-    c = HardcoreBank.deploy({'from': accounts[0]})
+def test_init_registory(bank):
+    c = bank
 
     # registory check
     register = testlib.get_deployed_contract()
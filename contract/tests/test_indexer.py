@@ -0,0 +1,51 @@
+from brownie import accounts
+from brownie import convert
+import testlib
+
+from scripts.indexer import Indexer
+
+
+def test_indexer(bank, sample_token):
+    st = sample_token
+    c = bank
+    indexer = Indexer(c.address, start_block=c.tx.block_number)
+
+    name = 'Buy House'
+    description = 'Saving up to buy a house'
+    total_amount = 1e18
+    monthly = 1e5
+    c.createAccount(name, description, st.address, total_amount, monthly, {'from': accounts[1]})
+    c.createAccount(name, description, st.address, total_amount, monthly, {'from': accounts[1]})
+    st.send(c.address, 1e10, convert.to_bytes(0), {'from': accounts[0]})
+    st.send(c.address, 1e12, convert.to_bytes(1), {'from': accounts[0]})
+    c.createAccount(name, description, st.address, 1e12, monthly, {'from': accounts[2]})
+    st.send(c.address, 5e11, convert.to_bytes(2), {'from': accounts[0]})
+
+    testlib.increaseTime(60*60*24*62)  # skip 2 months
+    st.send(c.address, 1e15, convert.to_bytes(0), {'from': accounts[0]})
+    c.disable(1, {'from': accounts[1]})
+    st.send(c.address, 1e12, convert.to_bytes(2), {'from': accounts[0]})
+    c.withdraw(2, {'from': accounts[2]})  # 20% of the 1st deposit is forfeited
+
+    assert indexer.sync() == 11
+    assert [a['id'] for a in indexer.accounts(owner=accounts[1])] == [0]
+    assert len(indexer.accounts(include_disabled=True)) == 3
+
+    account = indexer.account(0)
+    assert account['subject'] == name
+    assert account['targetAmount'] == total_amount
+    assert [amount for _, amount in indexer.deposits(0)] == [1e10, 1e15]
+
+    now = testlib.latest_timestamp()
+    assert indexer.balance_of(0, now) == c.balanceOf(0, {'from': accounts[1]})
+    assert indexer.collected_amount(st.address, now) == c.collectedAmount(st.address, {'from': accounts[0]})
+
+    # only new logs
+    assert indexer.sync() == 0
+
+    c.collect(st.address, {'from': accounts[0]})
+    assert indexer.sync() == 1
+    assert indexer.collected_amount(st.address, now) == c.collectedAmount(st.address, {'from': accounts[0]})
+    st.send(c.address, 1e15, convert.to_bytes(0), {'from': accounts[0]})
+    assert indexer.sync() == 1
+    assert indexer.balance_of(0, testlib.latest_timestamp()) == c.balanceOf(0, {'from': accounts[1]})
@@ -0,0 +1,76 @@
+from brownie import accounts
+from brownie import convert
+from hypothesis import HealthCheck, given, settings, strategies
+import random
+import testlib
+
+from scripts import reference, rules
+
+
+DAY = 60*60*24
+
+
+def test_reference_rules():
+    # same result as the scalar rules, for many random accounts at once
+    rnd = random.Random(0)
+    created, target, monthly, deposit_account, deposit_timestamp, deposit_amount, now = [], [], [], [], [], [], []
+    deposits = []
+    for i in range(500):
+        c = rnd.randint(1_600_000_000, 1_700_000_000)
+        t = c
+        history = []
+        for _ in range(rnd.randint(0, 20)):
+            t += rnd.randint(0, 70*DAY)
+            history.append((t, rnd.randint(0, 10**6) * 10**18))
+        created.append(c)
+        target.append(rnd.choice([10**6, 10**12]) * 10**18)
+        monthly.append(rnd.choice([0, 10**5]) * 10**18)
+        now.append(t + rnd.choice([0, 1, 40*DAY]))
+        deposits.append(history)
+        for timestamp, amount in history:
+            deposit_account.append(i)
+            deposit_timestamp.append(timestamp)
+            deposit_amount.append(amount)
+
+    result = reference.evaluate(created, target, monthly, deposit_account, deposit_timestamp, deposit_amount, now)
+    for i in range(len(created)):
+        expected = rules.balance_of(created[i], target[i], monthly[i], deposits[i], now[i])
+        assert result.balance[i] == expected
+        assert result.forfeited[i] == sum(amount for _, amount in deposits[i]) - expected
+
+
+def test_reference_month_index():
+    created = rules.days_from_date(2021, 1, 31) * DAY + 100
+    timestamps = [created, rules.add_months(created, 1) - 1, rules.add_months(created, 1), rules.add_months(created, 13)]
+    assert list(reference.month_index(created, timestamps)) == [1, 1, 2, 14]
+
+
+steps = strategies.lists(
+    strategies.tuples(strategies.integers(0, 70), strategies.integers(0, 10**6)),  # (skip days, amount)
+    min_size=1, max_size=6,
+)
+
+@given(steps=steps, target=strategies.sampled_from([10**6, 10**18]), monthly=strategies.sampled_from([0, 10**5]))
+@settings(max_examples=10, deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+def test_reference_contract(bank, sample_token, steps, target, monthly):
+    st = sample_token
+    c = bank
+
+    # new account for each example
+    tx = c.createAccount('Buy House', 'Saving up to buy a house', st.address, target, monthly, {'from': accounts[1]})
+    id = tx.events['AccountCreated']['id']
+    created = tx.events['AccountCreated']['created']
+
+    deposit_timestamp = []
+    deposit_amount = []
+    for days, amount in steps:
+        testlib.increaseTime(days*DAY)
+        tx = st.send(c.address, amount, convert.to_bytes(id), {'from': accounts[0]})
+        deposit_timestamp.append(tx.events['Deposited']['timestamp'])
+        deposit_amount.append(amount)
+    testlib.mine()
+
+    now = testlib.latest_timestamp()
+    result = reference.evaluate([created], [target], [monthly], [0] * len(deposit_amount),
+                                deposit_timestamp, deposit_amount, now)
+    assert result.balance[0] == c.balanceOf(id, {'from': accounts[1]})
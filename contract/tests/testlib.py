@@ -10,26 +10,69 @@ def get_deployed_contract():
     return c
 
 
-def mine(address='localhost', port=8545):
+def latest_timestamp():
+    return web3.eth.get_block('latest')['timestamp']
+
+
+class RPCError(Exception):
+    pass
+
+
+class RPCClient:
+    # JSON-RPC client with a keep-alive session, which can send many methods in one request
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.session = requests.Session()
+        self._id = 0
+
+    def call(self, method, *params):
+        return self.batch([(method, list(params))])[0]
+
+    def batch(self, calls):
+        """calls: [(method, params), ...], returns results in the same order"""
+        payload = []
+        for method, params in calls:
+            self._id += 1
+            payload.append({"jsonrpc": "2.0", "id": self._id, "method": method, "params": params})
+
+        resp = self.session.post(self.endpoint, json=payload)
+        assert resp.status_code == 200
+
+        results = {r["id"]: r for r in resp.json()}
+        ordered = []
+        for request in payload:
+            r = results[request["id"]]
+            if "error" in r:
+                raise RPCError(f'{request["method"]}: {r["error"]}')
+            ordered.append(r.get("result"))
+        return ordered
+
+
+_client = None
+
+def rpc():
+    # client for the active brownie network
+    global _client
+    endpoint = web3.provider.endpoint_uri
+    if _client is None or _client.endpoint != endpoint:
+        _client = RPCClient(endpoint)
+    return _client
+
+
+def mine(blocks=1):
     # force mine
-    mine_call = {
-        "jsonrpc": "2.0",
-        "method": "evm_mine",
-    }
-    resp = requests.post(f'http://{address}:{port}', json=mine_call)
-    assert resp.status_code == 200
-
-
-def increaseTime(seconds: int, address='localhost', port=8545):
-    mine(address, port)
-
-    # call evm_increaseTime
-    time_call = {
-        "jsonrpc": "2.0",
-        "method": "evm_increaseTime",
-        "params": [seconds,]
-    }
-    resp = requests.post(f'http://{address}:{port}', json=time_call)
-    assert resp.status_code == 200
-
-    mine()
+    rpc().batch([("evm_mine", [])] * blocks)
+
+
+def increaseTime(seconds: int):
+    rpc().batch([
+        ("evm_mine", []),
+        ("evm_increaseTime", [seconds]),
+        ("evm_mine", []),
+    ])
+
+
+def setTime(timestamp: int):
+    # mine a block at `timestamp` (ganache doesn't have evm_setNextBlockTimestamp)
+    rpc().call("evm_mine", timestamp)
@@ -39,31 +39,50 @@ function getAccounts() {
     _getAccounts();
 }
 
-async function _getAccounts() {
-    let data = await hardcoreBank.methods.getAccounts().call({'from': accounts[0]})
-    let result = new Array(data.length);
-    for (let i = 0; i < data.length; i++) {
-        const account = data[i];
+// token address => Promise of {name, symbol}
+const tokenInfoCache = new Map();
+
+function getTokenInfo(tokenContractAddress) {
+    if (!tokenInfoCache.has(tokenContractAddress)) {
+        let tokenContract = new web3.eth.Contract(erc777abi, tokenContractAddress);
+        let info = Promise.all([
+            tokenContract.methods.name().call(),
+            tokenContract.methods.symbol().call(),
+        ])
+            .then(([name, symbol]) => ({'name': name, 'symbol': symbol}))
+            .catch((err) => {
+                tokenInfoCache.delete(tokenContractAddress);
+                throw err;
+            });
+        tokenInfoCache.set(tokenContractAddress, info);
+    }
+    return tokenInfoCache.get(tokenContractAddress);
+}
 
-        let balance = await hardcoreBank.methods.balanceOf(account[0]).call({'from': accounts[0]})
+async function _getAccounts() {
+    // accounts and balances in one call, token metadata in parallel
+    let data = await hardcoreBank.methods.getAccountsWithBalances().call({'from': accounts[0]})
+    let result = await Promise.all(data.map(async (item) => {
+        const account = item[0];
+        const balance = item[1];
 
         let tokenContractAddress = account[4];
-        let tokenContract = new web3.eth.Contract(erc777abi, tokenContractAddress);
-        let tokenName = await tokenContract.methods.name().call();
-        let tokenSymbol = await tokenContract.methods.symbol().call();
-        result[i] = {
+        let tokenInfo = await getTokenInfo(tokenContractAddress);
+        return {
             'id': account[0],
             'subject': account[2],
             'description': account[3],
             'contractAddress': tokenContractAddress,
-            'tokenName': tokenName,
-            'tokenSymbol': tokenSymbol,
+            'tokenName': tokenInfo.name,
+            'tokenSymbol': tokenInfo.symbol,
             'targetAmount': account[5],
             'monthlyRemittrance': account[6],
             'created': parseInt(account[7]),
             'balance': balance,
+            'monthTotal': item[2],
+            'monthStatus': parseInt(item[3]),
         }
-    }
+    }));
 
     app.ports.gotAccounts.send(result);
 }